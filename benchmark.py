@@ -0,0 +1,98 @@
+"""
+Itinerary Builder Benchmark
+
+This script times ItineraryBuilder on a large synthetic catalogue and reports
+the speedup of the sharded builder for 1..N worker processes, and compares
+Itinerary JSON/binary export with building a dict per concert for json.dumps.
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from concerts_data import generate_concerts
+from main import Itinerary, ItineraryBuilder
+
+def make_catalogue(size, artists=5000, seed=42):
+    return list(generate_concerts(size, artists=artists, seed=seed))
+
+def time_call(func, *args, repeat=3, **kwargs):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def parent_payload(concerts):
+    """The per-concert work build_itinerary_parallel still does in the parent process."""
+    return [c.date for c in concerts], [c.artist_id for c in concerts]
+
+def speedup_curve(concerts, max_workers):
+    builder = ItineraryBuilder()
+    expected = builder.build_itinerary(concerts)
+    serial = time_call(builder.build_itinerary, concerts)
+    parent = time_call(parent_payload, concerts)
+
+    print(f"Catalogue size: {len(concerts)}")
+    print(f"Serial build_itinerary: {serial:.3f}s")
+    print(f"Parent-side payload building: {parent:.3f}s "
+          f"(caps the speedup at {serial / parent:.1f}x before pickling and pool overhead)")
+    print()
+    print(f"{'workers':>8} {'seconds':>10} {'speedup':>8}")
+    for workers in range(1, max_workers + 1):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            if builder.build_itinerary_parallel(concerts, workers=workers, executor=pool) != expected:
+                raise AssertionError(f"Parallel result differs from serial with {workers} workers")
+            elapsed = time_call(builder.build_itinerary_parallel, concerts, workers=workers, executor=pool)
+        print(f"{workers:>8} {elapsed:>10.3f} {serial / elapsed:>7.2f}x")
+    print()
+    print("One worker runs in-process and needs no sort, so it can beat build_itinerary on its own.")
+    print("Gains beyond that need real cores; with os.cpu_count() = "
+          f"{os.cpu_count()}, more workers than that only add pickling overhead.")
+
+def naive_json(concerts):
+    return json.dumps([{"artist": c.artist, "date": c.date, "location": c.location,
+                        "latitude": c.latitude, "longitude": c.longitude}
+                       for c in concerts], separators=(",", ":")).encode("utf-8")
+
+def streamed_json(itinerary):
+    buffer = io.BytesIO()
+    itinerary.write_json(buffer)
+    return buffer.getvalue()
+
+def serialization(concerts):
+    itinerary = Itinerary(concerts)
+    if itinerary.to_json_bytes() != naive_json(concerts):
+        raise AssertionError("Itinerary.to_json_bytes differs from json.dumps output")
+
+    print(f"Serializing {len(concerts)} concerts")
+    print(f"{'method':>24} {'seconds':>10} {'bytes':>12}")
+    for name, func in [
+        ("naive json.dumps", lambda: naive_json(concerts)),
+        ("Itinerary.to_json_bytes", itinerary.to_json_bytes),
+        ("Itinerary.write_json", lambda: streamed_json(itinerary)),
+        ("Itinerary.to_binary", itinerary.to_binary),
+    ]:
+        size = len(func())
+        print(f"{name:>24} {time_call(func):>10.3f} {size:>12}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1_000_000, help="number of concerts")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--bench", choices=["all", "parallel", "serialization"], default="all")
+    args = parser.parse_args()
+
+    concerts = make_catalogue(args.size)
+    if args.bench in ("all", "parallel"):
+        speedup_curve(concerts, args.max_workers)
+        print()
+    if args.bench in ("all", "serialization"):
+        serialization(concerts)
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,27 @@ This file contains the dataset of concerts that will be used
 for the experiment.
 """
 
+import csv
+import itertools
+import random
+from datetime import date, timedelta
+
 from main import Concert
 
+VENUES = [
+    ("Stockholm", 59.3293, 18.0686),
+    ("Copenhagen", 55.6761, 12.5683),
+    ("Oslo", 59.9139, 10.7522),
+    ("Gothenburg", 57.7089, 11.9746),
+    ("Malmö", 55.6050, 13.0038),
+    ("London", 51.5074, -0.1278),
+    ("Berlin", 52.5200, 13.4050),
+    ("Paris", 48.8566, 2.3522),
+    ("Amsterdam", 52.3676, 4.9041),
+]
+
+CSV_HEADER = ("artist", "date", "location", "latitude", "longitude")
+
 CONCERTS_DATA = [
     Concert("Taylor Swift", "2025-06-10", "Stockholm", 59.3293, 18.0686),
     Concert("Taylor Swift", "2025-07-15", "Copenhagen", 55.6761, 12.5683),
@@ -43,4 +62,96 @@ def get_all_concerts():
     Returns:
         list: A list of Concert objects
     """
-    return CONCERTS_DATA.copy()
\ No newline at end of file
+    return CONCERTS_DATA.copy()
+
+def generate_concert_rows(count, artists=1000, tours_per_artist=3, tour_length=30,
+                          start_date="2025-01-01", span_days=365, venues=None,
+                          venue_weights=None, collision_rate=0.1, seed=None):
+    """
+    Lazily yields synthetic (artist, date, location, latitude, longitude) rows.
+    
+    Args:
+        count (int): Number of rows to generate.
+        artists (int): Number of distinct artists.
+        tours_per_artist (int): Tours per artist; each tour is a run of up to
+            tour_length days starting at a random day in the span.
+        tour_length (int): Maximum length of a tour in days.
+        start_date (str): First possible concert date, 'YYYY-MM-DD'.
+        span_days (int): Number of days covered by the catalogue.
+        venues (list): (location, latitude, longitude) tuples, defaults to VENUES.
+        venue_weights (list): Relative weight per venue, uniform by default.
+        collision_rate (float): Probability that a row reuses the previous
+            row's date, forcing a same-day conflict.
+        seed: Seed for the random generator; the same seed gives the same rows.
+    
+    Returns:
+        iterator: Rows in generation order (not sorted by date).
+    """
+    rng = random.Random(seed)
+    venues = venues or VENUES
+    first_day = date.fromisoformat(start_date)
+    days = [(first_day + timedelta(days=i)).isoformat() for i in range(span_days + tour_length)]
+    names = [f"Artist {i}" for i in range(artists)]
+    tour_starts = [[rng.randrange(span_days) for _ in range(tours_per_artist)]
+                   for _ in range(artists)]
+    cum_weights = list(itertools.accumulate(venue_weights or [1] * len(venues)))
+    
+    random_float = rng.random
+    last_date = days[0]
+    remaining = count
+    while remaining > 0:
+        batch = min(remaining, 4096)
+        remaining -= batch
+        chosen_venues = rng.choices(venues, cum_weights=cum_weights, k=batch)
+        for location, latitude, longitude in chosen_venues:
+            artist = int(random_float() * artists)
+            if random_float() < collision_rate:
+                concert_date = last_date
+            else:
+                tour = tour_starts[artist][int(random_float() * tours_per_artist)]
+                concert_date = days[tour + int(random_float() * tour_length)]
+            last_date = concert_date
+            yield (names[artist], concert_date, location, latitude, longitude)
+
+def generate_concerts(count, **options):
+    """
+    Lazily yields synthetic Concert objects.
+    
+    Takes the same options as generate_concert_rows.
+    
+    Returns:
+        iterator: Concert objects
+    """
+    for row in generate_concert_rows(count, **options):
+        yield Concert(*row)
+
+def write_concerts_csv(path, rows):
+    """
+    Streams concert rows (tuples or Concert objects) to a CSV file.
+    
+    Returns:
+        int: Number of rows written
+    """
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for row in rows:
+            if isinstance(row, Concert):
+                row = (row.artist, row.date, row.location, row.latitude, row.longitude)
+            writer.writerow(row)
+            written += 1
+    return written
+
+def read_concerts_csv(path):
+    """
+    Lazily yields Concert objects from a CSV file written by write_concerts_csv.
+    
+    Returns:
+        iterator: Concert objects
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for artist, concert_date, location, latitude, longitude in reader:
+            yield Concert(artist, concert_date, location, float(latitude), float(longitude))
@@ -0,0 +1,263 @@
+"""
+Differential Testing Harness
+
+This module keeps every historical build_itinerary variant from main.py as a
+selectable reference engine, generates random catalogues and checks a
+candidate engine against a reference, shrinking any mismatch to a minimal
+counterexample.
+"""
+
+import argparse
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from concerts_data import VENUES
+from main import Concert, ItineraryBuilder
+
+# ----- Reference Engines -----
+# Copies of the phases kept commented out in main.py, as plain functions, and
+# of the AI Refactor phase as it stood before any performance work, so the
+# references never change when main.py does.
+
+def green_build_itinerary(concerts):
+    """GREEN phase: earliest per artist, first concert wins each day."""
+    if not concerts:
+        return []
+
+    artist_list = {}
+    for concert in sorted(concerts, key=lambda x: x.date):
+        if concert.artist not in artist_list:
+            artist_list[concert.artist] = concert
+
+    date_list = {}
+    for concert in artist_list.values():
+        if concert.date not in date_list:
+            date_list[concert.date] = concert
+
+    return list(date_list.values())
+
+def refactor_build_itinerary(concerts):
+    """Refactor phase: GREEN phase as a dict comprehension, last concert wins each day."""
+    if not concerts:
+        return []
+
+    artist_list = {}
+    for concert in sorted(concerts, key=lambda x: x.date):
+        if concert.artist not in artist_list:
+            artist_list[concert.artist] = concert
+
+    return list({
+        concert.date: concert
+        for concert in artist_list.values()
+    }.values())
+
+def ai_green_build_itinerary(concerts):
+    """AI Green phase: proximity-based same-day conflict resolution."""
+    if not concerts:
+        return ["No concerts available"]
+
+    artist_concerts = {}
+    for concert in sorted(concerts, key=lambda x: x.date):
+        if concert.artist not in artist_concerts:
+            artist_concerts[concert.artist] = concert
+
+    itinerary = []
+    for concert in sorted(artist_concerts.values(), key=lambda x: x.date):
+        if not itinerary:
+            itinerary.append(concert)
+        else:
+            last = itinerary[-1]
+            if concert.date == last.date:
+                if len(itinerary) == 1:
+                    next_concert = [c for c in artist_concerts.values()
+                                    if c.date > concert.date][0]
+                    if (concert.latitude == next_concert.latitude and
+                            concert.longitude == next_concert.longitude):
+                        itinerary[-1] = concert
+                elif len(itinerary) >= 2:
+                    last_non_conflict = itinerary[-2]
+                    current_dist = math.sqrt((concert.latitude - last_non_conflict.latitude)**2 +
+                                             (concert.longitude - last_non_conflict.longitude)**2)
+                    existing_dist = math.sqrt((last.latitude - last_non_conflict.latitude)**2 +
+                                              (last.longitude - last_non_conflict.longitude)**2)
+                    if current_dist < existing_dist:
+                        itinerary[-1] = concert
+            else:
+                itinerary.append(concert)
+    return itinerary
+
+class _AIRefactorBuilder:
+    """AI Refactor phase: ItineraryBuilder as it stood before any performance work."""
+    
+    def build_itinerary(self, concerts):
+        if not concerts:
+            return ["No concerts available"]
+        
+        artist_concerts = self._get_earliest_concerts_by_artist(concerts)
+        itinerary = []
+        
+        for concert in sorted(artist_concerts.values(), key=lambda x: x.date):
+            if not itinerary:
+                itinerary.append(concert)
+            else:
+                self._resolve_conflicts(concert, itinerary, artist_concerts)
+        
+        return itinerary
+
+    def _get_earliest_concerts_by_artist(self, concerts):
+        artist_concerts = {}
+        for concert in sorted(concerts, key=lambda x: x.date):
+            if concert.artist not in artist_concerts:
+                artist_concerts[concert.artist] = concert
+        return artist_concerts
+
+    def _resolve_conflicts(self, new_concert, itinerary, artist_concerts):
+        last_concert = itinerary[-1]
+        
+        if new_concert.date != last_concert.date:
+            itinerary.append(new_concert)
+            return
+        
+        if len(itinerary) == 1:
+            next_concert = self._find_next_concert(new_concert, artist_concerts)
+            if next_concert and self._is_same_location(new_concert, next_concert):
+                itinerary[-1] = new_concert
+        else:
+            last_non_conflict = itinerary[-2]
+            if self._is_closer(new_concert, last_concert, last_non_conflict):
+                itinerary[-1] = new_concert
+
+    def _find_next_concert(self, concert, artist_concerts):
+        for c in sorted(artist_concerts.values(), key=lambda x: x.date):
+            if c.date > concert.date:
+                return c
+        return None
+
+    def _is_same_location(self, concert1, concert2):
+        if not concert2:
+            return False
+        return (concert1.latitude == concert2.latitude and 
+                concert1.longitude == concert2.longitude)
+
+    def _is_closer(self, new_concert, existing_concert, reference_concert):
+        new_dist = self._calculate_distance(new_concert, reference_concert)
+        existing_dist = self._calculate_distance(existing_concert, reference_concert)
+        return new_dist < existing_dist
+
+    def _calculate_distance(self, concert1, concert2):
+        return math.hypot(
+            concert1.latitude - concert2.latitude,
+            concert1.longitude - concert2.longitude
+        )
+
+def ai_refactor_build_itinerary(concerts):
+    """AI Refactor phase, frozen: the baseline ItineraryBuilder.build_itinerary."""
+    return _AIRefactorBuilder().build_itinerary(concerts)
+
+def current_build_itinerary(concerts):
+    """The live ItineraryBuilder.build_itinerary from main.py."""
+    return ItineraryBuilder().build_itinerary(concerts)
+
+_POOL = None
+
+def parallel_build_itinerary(concerts):
+    """Parallel builder, three chunks on a shared worker pool."""
+    global _POOL
+    if _POOL is None:
+        _POOL = ProcessPoolExecutor(max_workers=3)
+    return ItineraryBuilder().build_itinerary_parallel(concerts, workers=3, executor=_POOL)
+
+ENGINES = {
+    "green": green_build_itinerary,
+    "refactor": refactor_build_itinerary,
+    "ai_green": ai_green_build_itinerary,
+    "ai_refactor": ai_refactor_build_itinerary,
+    "current": current_build_itinerary,
+    "parallel": parallel_build_itinerary,
+}
+
+# ----- Catalogue Generation -----
+
+def random_catalogue(rng, max_size=12):
+    """
+    Returns a small random catalogue biased towards the tricky cases:
+    few days (many same-day clashes), few artists (duplicates) and
+    the first five venues only (shared coordinates).
+    """
+    size = rng.randint(0, max_size)
+    days = rng.randint(1, max(1, size))
+    artists = rng.randint(1, max(1, size))
+    concerts = []
+    for _ in range(size):
+        city, lat, lon = rng.choice(VENUES[:5])
+        concerts.append(Concert(f"Artist{rng.randrange(artists)}",
+                                f"2025-06-{rng.randrange(days) + 1:02d}",
+                                city, lat, lon))
+    return concerts
+
+# ----- Differential Checking -----
+
+def run_engine(engine, concerts):
+    """Returns the engine's itinerary, or the exception type name if it raised."""
+    try:
+        return engine(concerts)
+    except Exception as e:
+        return type(e).__name__
+
+def engines_agree(candidate, reference, concerts):
+    return run_engine(candidate, concerts) == run_engine(reference, concerts)
+
+def shrink(candidate, reference, concerts):
+    """Greedily drops concerts while the engines still disagree."""
+    concerts = list(concerts)
+    shrunk = True
+    while shrunk:
+        shrunk = False
+        for i in range(len(concerts)):
+            smaller = concerts[:i] + concerts[i + 1:]
+            if not engines_agree(candidate, reference, smaller):
+                concerts = smaller
+                shrunk = True
+                break
+    return concerts
+
+def find_counterexample(candidate, reference, cases=1000, seed=0, max_size=12):
+    """
+    Checks `cases` random catalogues and returns the first disagreement,
+    shrunk to a minimal catalogue, or None if the engines always agree.
+    """
+    rng = random.Random(seed)
+    for _ in range(cases):
+        concerts = random_catalogue(rng, max_size)
+        if not engines_agree(candidate, reference, concerts):
+            return shrink(candidate, reference, concerts)
+    return None
+
+def describe(concerts):
+    return "\n".join(f"  Concert({c.artist!r}, {c.date!r}, {c.location!r}, {c.latitude}, {c.longitude})"
+                     for c in concerts)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--engine", choices=ENGINES, default="parallel")
+    parser.add_argument("--reference", choices=ENGINES, default="ai_refactor")
+    parser.add_argument("--cases", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counterexample = find_counterexample(ENGINES[args.engine], ENGINES[args.reference],
+                                         cases=args.cases, seed=args.seed)
+    elapsed = time.perf_counter() - start
+
+    if counterexample is None:
+        print(f"{args.engine} agrees with {args.reference} on {args.cases} cases "
+              f"({args.cases / elapsed:.0f} cases/s)")
+    else:
+        print(f"{args.engine} disagrees with {args.reference} on:")
+        print(describe(counterexample))
+
+if __name__ == "__main__":
+    main()
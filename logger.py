@@ -7,13 +7,283 @@ during the experiment, including:
 - File modifications
 - Code coverage metrics
 - Constraint assignments
+- Profiling hotspots and peak memory
 """
 
 import os
+import re
 import time
 import json
+import sqlite3
 import datetime
-import coverage
+import tempfile
+import contextlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+class HistoryStore:
+    """
+    Compact SQLite (WAL mode) copy of the experiment history.
+    
+    experiment_log.json stays the full record; this store keeps only counts,
+    per-file coverage and task durations, indexed so that progress summaries
+    and trends do not depend on how long the history is.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS test_runs (
+            id INTEGER PRIMARY KEY, timestamp TEXT, total INTEGER, failures INTEGER,
+            errors INTEGER, skipped INTEGER, success INTEGER);
+        CREATE TABLE IF NOT EXISTS coverage_reports (
+            id INTEGER PRIMARY KEY, timestamp TEXT, total_coverage REAL);
+        CREATE TABLE IF NOT EXISTS file_coverage (
+            report_id INTEGER, file TEXT, lines_total INTEGER, lines_covered INTEGER,
+            lines_missed INTEGER, percentage REAL);
+        CREATE INDEX IF NOT EXISTS file_coverage_by_file ON file_coverage (file, report_id);
+        CREATE INDEX IF NOT EXISTS file_coverage_by_report ON file_coverage (report_id);
+        CREATE TABLE IF NOT EXISTS task_times (
+            id INTEGER PRIMARY KEY, timestamp TEXT, task TEXT, duration REAL);
+        CREATE TABLE IF NOT EXISTS task_totals (
+            task TEXT PRIMARY KEY, total_duration REAL NOT NULL, entries INTEGER NOT NULL);
+    """
+    
+    def __init__(self, db_file="experiment_log.db"):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+    
+    def close(self):
+        self.conn.close()
+    
+    def _bump(self, name):
+        self.conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+    
+    def _count(self, name):
+        row = self.conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        return row["value"] if row else 0
+    
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+    
+    def set_meta(self, key, value):
+        with self.conn:
+            self._set_meta(key, value)
+    
+    def record_test_run(self, timestamp, results):
+        with self.conn:
+            self._add_test_run(timestamp, results)
+    
+    def record_file_change(self):
+        with self.conn:
+            self._bump("file_changes")
+    
+    def record_coverage(self, coverage_data):
+        with self.conn:
+            self._add_coverage(coverage_data)
+    
+    def record_task_time(self, timestamp, task_name, duration):
+        with self.conn:
+            self._add_task_time(timestamp, task_name, duration)
+    
+    def reset(self):
+        """Deletes all history, e.g. before importing a new experiment log."""
+        with self.conn:
+            self._clear()
+    
+    def import_log(self, log_data):
+        """Copies an experiment_log.json structure into the store."""
+        with self.conn:
+            self._import(log_data)
+    
+    def replace_from_log(self, log_data, **meta):
+        """
+        Replaces the whole store with log_data and sets meta, in one
+        BEGIN IMMEDIATE transaction, so other processes see either the old
+        history or the new one and never write in between.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._clear()
+            self._import(log_data)
+            for key, value in meta.items():
+                self._set_meta(key, value)
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+    
+    # The helpers below write without committing; callers own the transaction.
+    
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+    
+    def _add_test_run(self, timestamp, results):
+        self.conn.execute(
+            "INSERT INTO test_runs (timestamp, total, failures, errors, skipped, success) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (timestamp, results["total"], results["failures"], results["errors"],
+             results.get("skipped", 0), int(results.get("success", False))))
+        self._bump("test_runs")
+    
+    def _add_coverage(self, coverage_data):
+        cursor = self.conn.execute(
+            "INSERT INTO coverage_reports (timestamp, total_coverage) VALUES (?, ?)",
+            (coverage_data["timestamp"], coverage_data.get("total_coverage", 0)))
+        self.conn.executemany(
+            "INSERT INTO file_coverage VALUES (?, ?, ?, ?, ?, ?)",
+            [(cursor.lastrowid, file, m["lines_total"], m["lines_covered"],
+              m["lines_missed"], m["percentage"])
+             for file, m in coverage_data.get("file_coverage", {}).items()])
+        self._bump("coverage_reports")
+    
+    def _add_task_time(self, timestamp, task_name, duration):
+        self.conn.execute(
+            "INSERT INTO task_times (timestamp, task, duration) VALUES (?, ?, ?)",
+            (timestamp, task_name, duration))
+        self.conn.execute(
+            "INSERT INTO task_totals (task, total_duration, entries) VALUES (?, ?, 1) "
+            "ON CONFLICT(task) DO UPDATE SET total_duration = total_duration + excluded.total_duration, "
+            "entries = entries + 1", (task_name, duration))
+    
+    def _clear(self):
+        for table in ("meta", "counters", "test_runs", "coverage_reports",
+                      "file_coverage", "task_times", "task_totals"):
+            self.conn.execute(f"DELETE FROM {table}")
+    
+    def _import(self, log_data):
+        if "experiment_start" in log_data:
+            self._set_meta("experiment_start", log_data["experiment_start"])
+        for run in log_data.get("test_runs", []):
+            self._add_test_run(run["timestamp"], run["results"])
+        for _ in log_data.get("file_changes", []):
+            self._bump("file_changes")
+        for report in log_data.get("coverage_reports", []):
+            self._add_coverage(report)
+        for task in log_data.get("task_times", []):
+            self._add_task_time(task["timestamp"], task["task"], task["duration"])
+    
+    def summary(self):
+        """Counts and latest entries, answered from counters and indexes only."""
+        latest_run = self.conn.execute("SELECT * FROM test_runs ORDER BY id DESC LIMIT 1").fetchone()
+        latest_cov = self.conn.execute("SELECT * FROM coverage_reports ORDER BY id DESC LIMIT 1").fetchone()
+        file_coverage = {}
+        if latest_cov:
+            for row in self.conn.execute("SELECT * FROM file_coverage WHERE report_id = ?", (latest_cov["id"],)):
+                file_coverage[row["file"]] = dict(row)
+        return {
+            "experiment_start": self.get_meta("experiment_start"),
+            "test_runs": self._count("test_runs"),
+            "file_changes": self._count("file_changes"),
+            "coverage_reports": self._count("coverage_reports"),
+            "latest_run": dict(latest_run) if latest_run else None,
+            "latest_coverage": dict(latest_cov) if latest_cov else None,
+            "latest_file_coverage": file_coverage,
+            "task_totals": self.task_durations(),
+        }
+    
+    def pass_rate_trend(self, limit=20):
+        """Returns [(timestamp, passed / total)] for the last `limit` test runs, oldest first."""
+        rows = self.conn.execute(
+            "SELECT timestamp, total, failures, errors FROM test_runs ORDER BY id DESC LIMIT ?",
+            (limit,)).fetchall()
+        return [(r["timestamp"], (r["total"] - r["failures"] - r["errors"]) / r["total"] if r["total"] else 0.0)
+                for r in reversed(rows)]
+    
+    def coverage_trend(self, file, limit=20):
+        """Returns [(timestamp, percentage)] for one file over the last `limit` reports, oldest first."""
+        rows = self.conn.execute(
+            "SELECT c.timestamp, f.percentage FROM file_coverage f "
+            "JOIN coverage_reports c ON c.id = f.report_id "
+            "WHERE f.file = ? ORDER BY f.report_id DESC LIMIT ?", (file, limit)).fetchall()
+        return [(r["timestamp"], r["percentage"]) for r in reversed(rows)]
+    
+    def task_durations(self):
+        """Returns {task: (total_minutes, entries)}."""
+        return {r["task"]: (r["total_duration"], r["entries"])
+                for r in self.conn.execute("SELECT * FROM task_totals ORDER BY task")}
+
+
+def history_file_for(log_file):
+    return os.path.splitext(log_file)[0] + ".db"
+
+EXPERIMENT_START = re.compile(r'"experiment_start"\s*:\s*"([^"]*)"')
+
+def _read_experiment_start(log_file):
+    """
+    Returns the experiment_start of a log file without parsing all of it;
+    the key is written first, so the head of the file is enough.
+    """
+    with open(log_file, 'r') as f:
+        match = EXPERIMENT_START.search(f.read(4096))
+    if match:
+        return match.group(1)
+    with open(log_file, 'r') as f:
+        return json.load(f).get("experiment_start")
+
+@contextlib.contextmanager
+def log_lock(log_file):
+    """
+    Holds an exclusive lock on log_file (through log_file + ".lock") across
+    processes. Every change to the log and its history store happens under it.
+    The lock is not re-entrant, not even within one process.
+    """
+    with open(log_file + ".lock", 'a+') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        else:
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+            else:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _history_is_current(history, log_file):
+    return (history.get_meta("imported") is not None
+            and history.get_meta("experiment_start") == _read_experiment_start(log_file))
+
+def open_history(log_file="experiment_log.json"):
+    """
+    Opens the history store next to log_file. The JSON history is imported
+    when the store is new, and again (replacing the store) whenever the log
+    belongs to a different experiment, e.g. after experiment_log.json was reset.
+    """
+    history = HistoryStore(history_file_for(log_file))
+    if not os.path.exists(log_file):
+        return history
+    
+    try:
+        if _history_is_current(history, log_file):
+            return history
+        # Another process may be importing or logging right now; check again
+        # under the log lock and import in a single transaction.
+        with log_lock(log_file):
+            if _history_is_current(history, log_file):
+                return history
+            with open(log_file, 'r') as f:
+                log_data = json.load(f)
+            history.replace_from_log(log_data,
+                                     experiment_start=log_data.get("experiment_start"),
+                                     imported=datetime.datetime.now().isoformat())
+    except json.JSONDecodeError:
+        pass
+    return history
+
 
 class ExperimentLogger:
     
@@ -21,42 +291,69 @@ class ExperimentLogger:
         self.log_file = log_file
         self.start_time = time.time()
         
-        if not os.path.exists(self.log_file):
-            with open(self.log_file, 'w') as f:
-                json.dump({
+        with self._lock():
+            if not os.path.exists(self.log_file):
+                self._save({
                     "experiment_start": datetime.datetime.now().isoformat(),
                     "test_runs": [],
                     "file_changes": [],
                     "coverage_reports": [],
                     "task_times": []
-                }, f, indent=2)
+                })
+        
+        self.history = open_history(self.log_file)
+    
+    def _lock(self):
+        return log_lock(self.log_file)
+    
+    @contextlib.contextmanager
+    def _edit(self):
+        """
+        Yields the log data and saves it back, all under the lock; record to
+        self.history inside the block so the store never misses or doubles
+        an entry that an import in another process sees.
+        """
+        with self._lock():
+            with open(self.log_file, 'r') as f:
+                log_data = json.load(f)
+            yield log_data
+            self._save(log_data)
+    
+    def _save(self, log_data):
+        # Write to a temporary file of our own and swap it in, so a cancelled
+        # background run never leaves a half-written log behind.
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.log_file)),
+                                        suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(log_data, f, indent=2)
+            os.replace(tmp_file, self.log_file)
+        except BaseException:
+            os.remove(tmp_file)
+            raise
     
     def log_test_run(self, test_results):
-        with open(self.log_file, 'r') as f:
-            log_data = json.load(f)
-        
-        log_data["test_runs"].append({
-            "timestamp": datetime.datetime.now().isoformat(),
-            "results": test_results
-        })
-        
-        with open(self.log_file, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        with self._edit() as log_data:
+            timestamp = datetime.datetime.now().isoformat()
+            log_data["test_runs"].append({
+                "timestamp": timestamp,
+                "results": test_results
+            })
+            
+            self.history.record_test_run(timestamp, test_results)
     
     def log_file_change(self, filename, action="modified"):
-        with open(self.log_file, 'r') as f:
-            log_data = json.load(f)
-        
-        log_data["file_changes"].append({
-            "timestamp": datetime.datetime.now().isoformat(),
-            "filename": filename,
-            "action": action
-        })
-        
-        with open(self.log_file, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        with self._edit() as log_data:
+            log_data["file_changes"].append({
+                "timestamp": datetime.datetime.now().isoformat(),
+                "filename": filename,
+                "action": action
+            })
+            
+            self.history.record_file_change()
     
     def log_coverage(self):
+        import coverage
         cov = coverage.Coverage()
         cov.start()
         
@@ -85,47 +382,63 @@ class ExperimentLogger:
                     "percentage": 100 * len(file_cov[2]) / len(file_cov[1]) if len(file_cov[1]) > 0 else 0
                 }
         
-        with open(self.log_file, 'r') as f:
-            log_data = json.load(f)
-        
-        log_data["coverage_reports"].append(coverage_data)
-        
-        with open(self.log_file, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        with self._edit() as log_data:
+            log_data["coverage_reports"].append(coverage_data)
+            
+            self.history.record_coverage(coverage_data)
         
         return coverage_data
     
     def log_task_time(self, task_name, duration):
-        with open(self.log_file, 'r') as f:
-            log_data = json.load(f)
-        
-        if "task_times" not in log_data:
-            log_data["task_times"] = []
-        
-        log_data["task_times"].append({
-            "timestamp": datetime.datetime.now().isoformat(),
-            "task": task_name,
-            "duration": duration
-        })
+        with self._edit() as log_data:
+            if "task_times" not in log_data:
+                log_data["task_times"] = []
+            
+            timestamp = datetime.datetime.now().isoformat()
+            log_data["task_times"].append({
+                "timestamp": timestamp,
+                "task": task_name,
+                "duration": duration
+            })
+            
+            self.history.record_task_time(timestamp, task_name, duration)
+    
+    def log_profile_run(self, profile_data):
+        """Appends a profile run and returns the previous one (or None) for comparison."""
+        with self._edit() as log_data:
+            if "profile_runs" not in log_data:
+                log_data["profile_runs"] = []
+            
+            previous = log_data["profile_runs"][-1] if log_data["profile_runs"] else None
+            log_data["profile_runs"].append(profile_data)
         
-        with open(self.log_file, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        return previous
     
     def log_constraints(self, manual_constraints, ai_constraints):
-        with open(self.log_file, 'r') as f:
-            log_data = json.load(f)
-        
-        log_data["constraints"] = {
-            "manual": manual_constraints,
-            "ai": ai_constraints,
-            "assigned_at": datetime.datetime.now().isoformat()
-        }
-        
-        with open(self.log_file, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        with self._edit() as log_data:
+            log_data["constraints"] = {
+                "manual": manual_constraints,
+                "ai": ai_constraints,
+                "assigned_at": datetime.datetime.now().isoformat()
+            }
+
+
+class _TeeStream:
+    """Writes test runner output to several streams at once."""
+    
+    def __init__(self, *streams):
+        self.streams = streams
+    
+    def write(self, text):
+        for stream in self.streams:
+            stream.write(text)
+    
+    def flush(self):
+        for stream in self.streams:
+            stream.flush()
 
 
-def run_tests_with_logging():
+def run_tests_with_logging(progress_stream=None):
     logger = ExperimentLogger()
     
     import unittest
@@ -134,7 +447,8 @@ def run_tests_with_logging():
     import sys
     
     output = StringIO()
-    runner = unittest.TextTestRunner(stream=output, verbosity=2)
+    stream = _TeeStream(output, progress_stream) if progress_stream else output
+    runner = unittest.TextTestRunner(stream=stream, verbosity=2)
     suite = unittest.TestLoader().loadTestsFromTestCase(ItineraryBuilderTest)
     result = runner.run(suite)
     
@@ -151,4 +465,120 @@ def run_tests_with_logging():
     
     coverage_data = logger.log_coverage()
     
-    return test_results, coverage_data
\ No newline at end of file
+    return test_results, coverage_data
+
+# Hotspots kept per profile run; more than a report shows, so that a
+# function that climbs into the shown top entries still has a previous time.
+STORED_HOTSPOTS = 50
+
+def _hotspot_name(code):
+    """file:qualified name for a code object; builtins keep cProfile's own label."""
+    if isinstance(code, str):
+        return code
+    # co_qualname (3.11+) tells Concert.__init__ from Itinerary.__init__.
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+def _top_hotspots(profiler, top):
+    """
+    Returns the top functions by own time, keyed as file:qualified name so the
+    same function keeps its key between runs when lines above it move;
+    functions that still share a key (e.g. two lambdas in one method) are
+    added together.
+    """
+    hotspots = {}
+    for entry in profiler.getstats():
+        key = _hotspot_name(entry.code)
+        hotspot = hotspots.setdefault(key, {
+            "function": key,
+            "calls": 0,
+            "total_time": 0.0,
+            "cumulative_time": 0.0
+        })
+        hotspot["calls"] += entry.callcount
+        hotspot["total_time"] += entry.inlinetime
+        hotspot["cumulative_time"] += entry.totaltime
+    return sorted(hotspots.values(), key=lambda h: h["total_time"], reverse=True)[:top]
+
+
+def _profile(func, top):
+    """Runs func under cProfile and tracemalloc; returns (result, profile summary)."""
+    import cProfile
+    import tracemalloc
+    
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        result = func()
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    
+    return result, {
+        "seconds": elapsed,
+        "peak_memory_kb": peak / 1024,
+        "hotspots": _top_hotspots(profiler, top)
+    }
+
+
+def run_profile_with_logging(workload_size=100000, top=STORED_HOTSPOTS, progress_stream=None):
+    """
+    Profiles the test suite and a synthetic build_itinerary workload of
+    workload_size concerts, logs the run with its `top` hotspots per section
+    and returns (profile_data, previous_run).
+    """
+    logger = ExperimentLogger()
+    
+    import unittest
+    from test import ItineraryBuilderTest
+    from io import StringIO
+    from concerts_data import generate_concerts
+    from main import ItineraryBuilder
+    
+    output = StringIO()
+    stream = _TeeStream(output, progress_stream) if progress_stream else output
+    suite = unittest.TestLoader().loadTestsFromTestCase(ItineraryBuilderTest)
+    result, suite_profile = _profile(lambda: unittest.TextTestRunner(stream=stream, verbosity=2).run(suite), top)
+    
+    concerts = list(generate_concerts(workload_size, seed=42))
+    _, workload_profile = _profile(lambda: ItineraryBuilder().build_itinerary(concerts), top)
+    
+    profile_data = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "tests_passed": result.wasSuccessful(),
+        "workload_size": workload_size,
+        "suite": suite_profile,
+        "workload": workload_profile
+    }
+    
+    previous = logger.log_profile_run(profile_data)
+    
+    return profile_data, previous
+
+
+def diff_profile_runs(previous, current):
+    """
+    Compares two profile runs section by section.
+    
+    Returns:
+        dict: {section: {"seconds": change, "peak_memory_kb": change,
+               "hotspots": {function: total_time change, or None if the
+               function was not among the previous run's stored hotspots}}}
+    """
+    diff = {}
+    for section in ("suite", "workload"):
+        before, after = previous[section], current[section]
+        before_times = {h["function"]: h["total_time"] for h in before["hotspots"]}
+        diff[section] = {
+            "seconds": after["seconds"] - before["seconds"],
+            "peak_memory_kb": after["peak_memory_kb"] - before["peak_memory_kb"],
+            "hotspots": {
+                h["function"]: (h["total_time"] - before_times[h["function"]]
+                                if h["function"] in before_times else None)
+                for h in after["hotspots"]
+            }
+        }
+    return diff
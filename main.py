@@ -4,8 +4,76 @@ Concert Itinerary Builder
 This module provides functionality to build an itinerary of upcoming concerts.
 """
 
+import hashlib
+import json
 import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+
+
+def _earliest_in_chunk(offset, dates, artists, start_date=None, end_date=None):
+    """
+    Worker: returns {artist: (date, index)} of each artist's earliest concert
+    in one unsorted chunk of the catalogue, where index = offset + position.
+    
+    Scanning in index order and replacing only on a strictly earlier date
+    keeps the lowest index among equal dates, which is what a stable sort by
+    date followed by a first-occurrence scan would pick.
+    """
+    earliest = {}
+    for position, (date, artist) in enumerate(zip(dates, artists)):
+        if (start_date is not None and date < start_date) or (end_date is not None and date > end_date):
+            continue
+        best = earliest.get(artist)
+        if best is None or date < best[0]:
+            earliest[artist] = (date, offset + position)
+    return earliest
+
+
+class Interner:
+    """
+    Maps hashable values to small, dense integer ids.
+    
+    Equal values share one id and one stored object, so repeated artist
+    names, cities and coordinates are kept in memory only once.
+    """
+    
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+    
+    def intern(self, value):
+        """Returns the id of value, assigning the next free id if it is new."""
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            self.ids[value] = value_id
+            self.values.append(value)
+        return value_id
+    
+    def value(self, value_id):
+        return self.values[value_id]
+    
+    def __len__(self):
+        return len(self.values)
+
+
+# Process-wide tables shared by every Concert. They only ever grow: a
+# long-running process that loads many different catalogues keeps every
+# artist, location and venue it has seen until it exits.
+ARTISTS = Interner()
+LOCATIONS = Interner()
+VENUES = Interner()
+
+
 class Concert:
     """
     Represents a concert event.
@@ -16,20 +84,415 @@ class Concert:
         location (str): The location where the concert will take place.
         latitude (float): Latitude coordinate of the concert location.
         longitude (float): Longitude coordinate of the concert location.
+        artist_id (int): Interned id of artist (see ARTISTS).
+        location_id (int): Interned id of location (see LOCATIONS).
+        venue_id (int): Interned id of (latitude, longitude) (see VENUES).
+    
+    The ids are assigned when the concert is created; create a new Concert
+    rather than changing artist, location or coordinates in place.
     """
     
     def __init__(self, artist, date, location, latitude, longitude):
-        self.artist = artist
+        self.artist_id = ARTISTS.intern(artist)
+        self.location_id = LOCATIONS.intern(location)
+        self.venue_id = VENUES.intern((latitude, longitude))
+        self.artist = ARTISTS.value(self.artist_id)
         self.date = date
-        self.location = location
+        self.location = LOCATIONS.value(self.location_id)
+        # Equal coordinates need not be identical (59 == 59.0, 0.0 == -0.0),
+        # so keep the caller's values and share only the venue id.
         self.latitude = latitude
         self.longitude = longitude
+    
+    def __reduce__(self):
+        # The ids are only valid in this process, so a pickled concert is
+        # re-created (and re-interned) from its values on the other side.
+        return (Concert, (self.artist, self.date, self.location, self.latitude, self.longitude))
+
+NO_CONCERTS = "No concerts available"
+
+# Encoded JSON fragments per interned id / date string, shared by all itineraries.
+_JSON_ARTISTS = {}
+_JSON_LOCATIONS = {}
+_JSON_VENUES = {}
+_JSON_DATES = {}
+
+
+def _json_record(concert):
+    """Returns the compact JSON object for a concert, built from cached fragments."""
+    artist = _JSON_ARTISTS.get(concert.artist_id)
+    if artist is None:
+        artist = _JSON_ARTISTS[concert.artist_id] = '{"artist":' + json.dumps(concert.artist)
+    date = _JSON_DATES.get(concert.date)
+    if date is None:
+        date = _JSON_DATES[concert.date] = ',"date":' + json.dumps(concert.date)
+    location = _JSON_LOCATIONS.get(concert.location_id)
+    if location is None:
+        location = _JSON_LOCATIONS[concert.location_id] = ',"location":' + json.dumps(concert.location)
+    venue = _JSON_VENUES.get(concert.venue_id)
+    if venue is None:
+        venue = _JSON_VENUES[concert.venue_id] = (
+            ',"latitude":' + json.dumps(concert.latitude) +
+            ',"longitude":' + json.dumps(concert.longitude) + '}')
+    return artist + date + location + venue
+
+
+def _pack_strings(values):
+    encoded = [v.encode("utf-8") for v in values]
+    lengths = array("I", [len(e) for e in encoded])
+    if sys.byteorder == "big":
+        lengths.byteswap()
+    return struct.pack("<I", len(encoded)) + lengths.tobytes() + b"".join(encoded)
+
+
+def _unpack_strings(view, offset):
+    (count,) = struct.unpack_from("<I", view, offset)
+    offset += 4
+    if offset + 4 * count > len(view):
+        raise ValueError("Truncated itinerary binary encoding")
+    lengths = array("I")
+    lengths.frombytes(view[offset:offset + 4 * count])
+    if sys.byteorder == "big":
+        lengths.byteswap()
+    offset += 4 * count
+    values = []
+    for length in lengths:
+        values.append(bytes(view[offset:offset + length]).decode("utf-8"))
+        offset += length
+    if offset > len(view):
+        raise ValueError("Truncated itinerary binary encoding")
+    return values, offset
+
+
+class Itinerary:
+    """
+    Typed result of ItineraryBuilder.build_result.
+    
+    Iterating yields the chosen Concert objects in chronological order. An
+    empty itinerary stands for "No concerts available".
+    
+    Attributes:
+        concerts (tuple): The Concert objects in the itinerary.
+    """
+    
+    BINARY_MAGIC = b"ITIN"
+    BINARY_VERSION = 1
+    
+    def __init__(self, concerts):
+        self.concerts = tuple(concerts)
+    
+    def __iter__(self):
+        return iter(self.concerts)
+    
+    def __len__(self):
+        return len(self.concerts)
+    
+    def __getitem__(self, index):
+        return self.concerts[index]
+    
+    def __eq__(self, other):
+        return isinstance(other, Itinerary) and self.concerts == other.concerts
+    
+    @property
+    def is_empty(self):
+        return not self.concerts
+    
+    def to_list(self):
+        """Returns the build_itinerary shape: a list of concerts, or ["No concerts available"]."""
+        return list(self.concerts) if self.concerts else [NO_CONCERTS]
+    
+    def to_json_bytes(self):
+        """
+        Returns the itinerary as a compact JSON array of
+        {"artist", "date", "location", "latitude", "longitude"} objects.
+        
+        Records are joined from fragments cached per interned artist, date,
+        location and venue, so no per-concert dict is built.
+        """
+        return ("[" + ",".join(map(_json_record, self.concerts)) + "]").encode("utf-8")
+    
+    def write_json(self, stream, chunk_size=4096):
+        """Streams to_json_bytes() to a binary stream, chunk_size concerts at a time."""
+        stream.write(b"[")
+        for start in range(0, len(self.concerts), chunk_size):
+            chunk = ",".join(map(_json_record, self.concerts[start:start + chunk_size]))
+            stream.write((("," if start else "") + chunk).encode("utf-8"))
+        stream.write(b"]")
+    
+    def to_binary(self):
+        """
+        Returns a compact binary encoding: a header, string tables for the
+        artists, dates and locations used, a (latitude, longitude) venue table
+        and four uint32 table indexes per concert.
+        """
+        artists, dates, locations, venues = Interner(), Interner(), Interner(), Interner()
+        records = array("I")
+        for c in self.concerts:
+            records.extend((artists.intern(c.artist), dates.intern(c.date),
+                            locations.intern(c.location), venues.intern((c.latitude, c.longitude))))
+        coordinates = array("d", [value for venue in venues.values for value in venue])
+        if sys.byteorder == "big":
+            records.byteswap()
+            coordinates.byteswap()
+        return b"".join([
+            struct.pack("<4sHI", self.BINARY_MAGIC, self.BINARY_VERSION, len(self.concerts)),
+            _pack_strings(artists.values),
+            _pack_strings(dates.values),
+            _pack_strings(locations.values),
+            struct.pack("<I", len(venues)),
+            coordinates.tobytes(),
+            records.tobytes(),
+        ])
+    
+    def write_binary(self, stream):
+        stream.write(self.to_binary())
+    
+    @classmethod
+    def from_binary(cls, data):
+        """
+        Decodes to_binary() output into an Itinerary of new Concert objects.
+        
+        Raises:
+            ValueError: If data is not a complete encoding of this version.
+        """
+        view = memoryview(data)
+        try:
+            magic, version, count = struct.unpack_from("<4sHI", view, 0)
+            if magic != cls.BINARY_MAGIC or version != cls.BINARY_VERSION:
+                raise ValueError("Not an itinerary binary encoding (or an unsupported version)")
+            offset = struct.calcsize("<4sHI")
+            artists, offset = _unpack_strings(view, offset)
+            dates, offset = _unpack_strings(view, offset)
+            locations, offset = _unpack_strings(view, offset)
+            (venue_count,) = struct.unpack_from("<I", view, offset)
+        except struct.error:
+            raise ValueError("Truncated itinerary binary encoding") from None
+        offset += 4
+        if len(view) != offset + 16 * venue_count + 16 * count:
+            raise ValueError(f"Itinerary binary encoding of {count} concerts and {venue_count} "
+                             f"venues should be {offset + 16 * (venue_count + count)} bytes, "
+                             f"not {len(view)}")
+        coordinates = array("d")
+        coordinates.frombytes(view[offset:offset + 16 * venue_count])
+        offset += 16 * venue_count
+        records = array("I")
+        records.frombytes(view[offset:offset + 16 * count])
+        if sys.byteorder == "big":
+            coordinates.byteswap()
+            records.byteswap()
+        for column, table_size in enumerate((len(artists), len(dates), len(locations), venue_count)):
+            if count and max(records[column::4]) >= table_size:
+                raise ValueError("Itinerary binary encoding refers past the end of a table")
+        return cls(
+            Concert(artists[records[i]], dates[records[i + 1]], locations[records[i + 2]],
+                    coordinates[2 * records[i + 3]], coordinates[2 * records[i + 3] + 1])
+            for i in range(0, len(records), 4))
+
+
+def write_json_lines(itineraries, stream):
+    """Streams a batch of itineraries to a binary stream, one JSON array per line."""
+    for itinerary in itineraries:
+        itinerary.write_json(stream)
+        stream.write(b"\n")
+
+
+def catalogue_hash(concerts):
+    """
+    Returns a SHA-256 digest of the concert data, in the given order.
+    
+    Each field is hashed as one column ("\0"-joined strings, packed doubles),
+    so the digest does not depend on the interned ids of the current process.
+    """
+    digest = hashlib.sha256()
+    for field in ("artist", "date", "location"):
+        digest.update("\0".join(map(attrgetter(field), concerts)).encode("utf-8"))
+        digest.update(b"\1")
+    for field in ("latitude", "longitude"):
+        values = array("d", map(attrgetter(field), concerts))
+        if sys.byteorder == "big":
+            values.byteswap()
+        digest.update(values.tobytes())
+    return digest.digest()
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """
+    Returns a SHA-256 digest of a file's bytes, for use as the fingerprint of
+    a catalogue read from that file; much cheaper than catalogue_hash.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+class PreparedCatalogue:
+    """
+    A catalogue with the work ItineraryBuilder does before every build done
+    up front, so it can be reused across builds and, through snapshot files,
+    across processes.
+    
+    Attributes:
+        concerts (list): The Concert objects, in the order they were given.
+        order: Indexes into concerts, sorted by date.
+        earliest: Indexes into concerts of each artist's earliest concert, by date.
+        day_starts: Positions in order where each distinct date starts,
+            followed by len(concerts); day i is order[day_starts[i]:day_starts[i + 1]].
+        catalogue_hash (bytes): The fingerprint given to prepare(), or
+            catalogue_hash(concerts).
+    
+    Restored snapshots keep order, earliest and day_starts as memoryviews
+    over the mapped file; call close() when done with them, which turns them
+    into lists.
+    """
+    
+    SNAPSHOT_MAGIC = b"ITINSNAP"
+    SNAPSHOT_VERSION = 1
+    # magic, version, byte order (1 = little endian), catalogue hash,
+    # concert count, earliest count, day count, distance count
+    SNAPSHOT_HEADER = struct.Struct("<8sHB32sIIII")
+    
+    def __init__(self, concerts, order, earliest, day_starts, catalogue_hash, mapping=None):
+        self.concerts = concerts
+        self.order = order
+        self.earliest = earliest
+        self.day_starts = day_starts
+        self.catalogue_hash = catalogue_hash
+        self._mapping = mapping
+        self._days = None
+    
+    def __len__(self):
+        return len(self.concerts)
+    
+    @property
+    def days(self):
+        """The distinct dates, sorted."""
+        if self._days is None:
+            self._days = [self.concerts[self.order[start]].date for start in self.day_starts[:-1]]
+        return self._days
+    
+    def ordered(self, start=0, end=None):
+        """Returns the date-sorted concerts at positions start..end of order."""
+        concerts = self.concerts
+        return [concerts[i] for i in self.order[start:end]]
+    
+    def window(self, start_date=None, end_date=None):
+        """Returns the (start, end) positions in order covering [start_date, end_date]."""
+        days = self.days
+        first = 0 if start_date is None else bisect_left(days, start_date)
+        last = len(days) if end_date is None else bisect_right(days, end_date)
+        return self.day_starts[first], self.day_starts[max(first, last)]
+    
+    def close(self):
+        """
+        Copies order, earliest and day_starts into lists and releases the
+        mapped snapshot file, if any. References to the old memoryviews are
+        released too; slices taken from them keep the file mapped until they
+        are garbage collected.
+        """
+        if self._mapping is not None:
+            sections = (self.order, self.earliest, self.day_starts)
+            self.order, self.earliest, self.day_starts = (list(section) for section in sections)
+            for section in sections:
+                section.release()
+            try:
+                self._mapping.close()
+            except BufferError:
+                pass  # a slice is still alive; the mmap is unmapped once it goes
+            self._mapping = None
+    
+    def save(self, path, distances=()):
+        """
+        Writes the prepared state and (lat1, lon1, lat2, lon2, distance)
+        entries to a snapshot file, replacing it atomically.
+        """
+        distance_values = array("d", [value for entry in distances for value in entry])
+        header = self.SNAPSHOT_HEADER.pack(
+            self.SNAPSHOT_MAGIC, self.SNAPSHOT_VERSION, int(sys.byteorder == "little"),
+            self.catalogue_hash, len(self.concerts), len(self.earliest),
+            len(self.day_starts) - 1, len(distance_values) // 5)
+        # Each writer gets its own temporary file, so processes rewriting the
+        # same stale snapshot never replace or interleave each other's bytes.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(header)
+                for values in (self.order, self.earliest, self.day_starts):
+                    f.write(array("I", values).tobytes())
+                f.write(distance_values.tobytes())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    
+    @classmethod
+    def load(cls, path, concerts, fingerprint=None):
+        """
+        Maps a snapshot file for concerts. The snapshot must have been made
+        with the same fingerprint, or without one if fingerprint is None.
+        
+        Returns:
+            tuple: (PreparedCatalogue, [(lat1, lon1, lat2, lon2, distance)]),
+            or None if the file is missing, unreadable, from another format
+            version or byte order, or was made for a different catalogue.
+        """
+        try:
+            with open(path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        
+        try:
+            magic, version, little_endian, digest, count, earliest_count, day_count, distance_count = \
+                cls.SNAPSHOT_HEADER.unpack_from(mapping, 0)
+            expected_size = (cls.SNAPSHOT_HEADER.size + 4 * (count + earliest_count + day_count + 1)
+                             + 8 * 5 * distance_count)
+            if (magic != cls.SNAPSHOT_MAGIC or version != cls.SNAPSHOT_VERSION
+                    or little_endian != int(sys.byteorder == "little")
+                    or len(mapping) != expected_size or count != len(concerts)
+                    or digest != (fingerprint or catalogue_hash(concerts))):
+                mapping.close()
+                return None
+        except struct.error:
+            mapping.close()
+            return None
+        
+        view = memoryview(mapping)
+        offset = cls.SNAPSHOT_HEADER.size
+        sections = []
+        for length in (count, earliest_count, day_count + 1):
+            sections.append(view[offset:offset + 4 * length].cast("I"))
+            offset += 4 * length
+        values = view[offset:].cast("d")
+        distances = [tuple(values[i:i + 5]) for i in range(0, len(values), 5)]
+        values.release()
+        view.release()
+        
+        prepared = cls(concerts, *sections, digest, mapping=mapping)
+        return prepared, distances
+
 
 class ItineraryBuilder:
     """
     A class to build concert itineraries. 
+    
+    Args:
+        start_date (str): Only consider concerts on or after this 'YYYY-MM-DD' date.
+        end_date (str): Only consider concerts on or before this 'YYYY-MM-DD' date.
+        min_gap_days (int): Rest days required between two concerts; concerts
+            closer than that conflict like two concerts on the same day.
+            0 (the default) only treats same-day concerts as conflicts.
     """
     
+    def __init__(self, start_date=None, end_date=None, min_gap_days=0):
+        if min_gap_days < 0:
+            raise ValueError("min_gap_days must not be negative")
+        self.start_date = start_date
+        self.end_date = end_date
+        self.min_gap_days = min_gap_days
+        self._distance_cache = {}
+        self._day_cache = {}
+    
     # <======GREEN phase========>
     # def build_itinerary(self, concerts):
     #     if not concerts:
@@ -135,39 +598,193 @@ class ItineraryBuilder:
     
     def build_itinerary(self, concerts):
         """Returns an optimized concert itinerary based on constraints."""
+        return self.build_result(concerts).to_list()
+
+    def build_result(self, concerts):
+        """
+        Returns the itinerary as an Itinerary object (empty if no concerts are available).
+        
+        concerts may be a list of Concert objects or a PreparedCatalogue.
+        """
         if not concerts:
-            return ["No concerts available"]
+            return Itinerary(())
+        if isinstance(concerts, PreparedCatalogue):
+            return self._build_prepared(concerts)
+        
+        # Process concerts: sort, keep the date window, deduplicate artists, and resolve conflicts
+        ordered = self._in_window(sorted(concerts, key=lambda x: x.date))
+        if not ordered:
+            return Itinerary(())
+        artist_concerts = self._get_earliest_concerts_by_artist(ordered, presorted=True)
+        return Itinerary(self._build_from_earliest(artist_concerts))
+
+    def build_itinerary_parallel(self, concerts, workers=None, executor=None):
+        """
+        Same result as build_itinerary, with the date window and per-artist
+        earliest selection done by worker processes.
+
+        The catalogue is split into contiguous, unsorted chunks. Each worker
+        scans its chunk for every artist's earliest (date, index), and the
+        merge keeps the minimum per artist, so only the merged per-artist list
+        is ever sorted. Conflict resolution depends on the previously kept
+        concert, so it runs once, serially, over that list. Pass an existing
+        executor to reuse its worker processes across calls.
+        """
+        if not concerts:
+            return [NO_CONCERTS]
+
+        workers = workers or os.cpu_count() or 1
+        size = max(1, -(-len(concerts) // workers))
+        chunks = [(start, [c.date for c in concerts[start:start + size]],
+                   [c.artist_id for c in concerts[start:start + size]],
+                   self.start_date, self.end_date)
+                  for start in range(0, len(concerts), size)]
+
+        if len(chunks) == 1:
+            chunk_results = [_earliest_in_chunk(*chunks[0])]
+        elif executor is not None:
+            chunk_results = list(executor.map(_earliest_in_chunk, *zip(*chunks)))
+        else:
+            with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+                chunk_results = list(pool.map(_earliest_in_chunk, *zip(*chunks)))
+
+        earliest = chunk_results[0]
+        for result in chunk_results[1:]:
+            for artist, candidate in result.items():
+                best = earliest.get(artist)
+                if best is None or candidate < best:
+                    earliest[artist] = candidate
+        if not earliest:
+            return [NO_CONCERTS]
+
+        artist_concerts = {concerts[index].artist_id: concerts[index]
+                           for _, index in sorted(earliest.values())}
+        return self._build_from_earliest(artist_concerts)
+
+    def prepare(self, concerts, fingerprint=None):
+        """
+        Returns a PreparedCatalogue: sorted order, per-artist earliest and
+        per-day buckets. fingerprint (a 32-byte digest, e.g. file_fingerprint
+        of the source file) identifies the catalogue in snapshots instead of
+        catalogue_hash.
+        """
+        concerts = list(concerts)
+        order = sorted(range(len(concerts)), key=lambda i: concerts[i].date)
         
-        # Process concerts: sort, deduplicate artists, and resolve conflicts
-        artist_concerts = self._get_earliest_concerts_by_artist(concerts)
+        earliest = []
+        seen_artists = set()
+        day_starts = []
+        last_date = None
+        for position, index in enumerate(order):
+            concert = concerts[index]
+            if concert.artist_id not in seen_artists:
+                seen_artists.add(concert.artist_id)
+                earliest.append(index)
+            if concert.date != last_date:
+                day_starts.append(position)
+                last_date = concert.date
+        day_starts.append(len(order))
+        
+        return PreparedCatalogue(concerts, order, earliest, day_starts,
+                                 fingerprint or catalogue_hash(concerts))
+
+    def save_snapshot(self, path, prepared):
+        """Writes prepared and this builder's distance cache to a snapshot file."""
+        venues = VENUES.values
+        distances = [venues[a] + venues[b] + (distance,)
+                     for (a, b), distance in self._distance_cache.items()]
+        prepared.save(path, distances)
+
+    def load_snapshot(self, path, concerts, fingerprint=None):
+        """
+        Restores a PreparedCatalogue for concerts from a snapshot file via mmap
+        and seeds the distance cache from it. If the snapshot is missing,
+        unreadable or made for a different catalogue, prepares concerts from
+        scratch and rewrites the snapshot instead; if the rewrite fails (e.g.
+        a read-only directory), the prepared catalogue is still returned.
+        Pass the fingerprint of the source (see prepare) to skip hashing
+        every concert.
+        """
+        concerts = list(concerts)
+        loaded = PreparedCatalogue.load(path, concerts, fingerprint)
+        if loaded is None:
+            prepared = self.prepare(concerts, fingerprint)
+            try:
+                self.save_snapshot(path, prepared)
+            except OSError:
+                pass
+            return prepared
+        
+        prepared, distances = loaded
+        for lat1, lon1, lat2, lon2, distance in distances:
+            key = (VENUES.intern((lat1, lon1)), VENUES.intern((lat2, lon2)))
+            self._distance_cache[key] = distance
+        return prepared
+
+    def _build_prepared(self, prepared):
+        """build_result for a PreparedCatalogue, skipping the sort and, without a window, the dedup."""
+        concerts = prepared.concerts
+        if self.start_date is None and self.end_date is None:
+            artist_concerts = {concerts[i].artist_id: concerts[i] for i in prepared.earliest}
+        else:
+            start, end = prepared.window(self.start_date, self.end_date)
+            artist_concerts = self._get_earliest_concerts_by_artist(prepared.ordered(start, end), presorted=True)
+        if not artist_concerts:
+            return Itinerary(())
+        return Itinerary(self._build_from_earliest(artist_concerts))
+
+    def _in_window(self, ordered):
+        """Returns the slice of a date-sorted list inside [start_date, end_date]."""
+        if self.start_date is None and self.end_date is None:
+            return ordered
+        start = 0 if self.start_date is None else self._bisect_date(ordered, self.start_date)
+        end = len(ordered) if self.end_date is None else self._bisect_date(ordered, self.end_date, right=True)
+        return ordered[start:end]
+
+    def _bisect_date(self, ordered, date, right=False):
+        """bisect_left (or bisect_right) on the dates of a date-sorted list, without copying them out."""
+        low, high = 0, len(ordered)
+        while low < high:
+            middle = (low + high) // 2
+            middle_date = ordered[middle].date
+            if middle_date < date or (right and middle_date == date):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _build_from_earliest(self, artist_concerts):
+        """Resolves same-day conflicts over an {artist_id: earliest_concert} mapping in date order."""
         itinerary = []
+        ordered = list(artist_concerts.values())
+        dates = [c.date for c in ordered]
         
-        for concert in sorted(artist_concerts.values(), key=lambda x: x.date):
+        for concert in ordered:
             if not itinerary:
                 itinerary.append(concert)
             else:
-                self._resolve_conflicts(concert, itinerary, artist_concerts)
+                self._resolve_conflicts(concert, itinerary, ordered, dates)
         
         return itinerary
 
-    def _get_earliest_concerts_by_artist(self, concerts):
-        """Returns {artist: earliest_concert} mapping."""
+    def _get_earliest_concerts_by_artist(self, concerts, presorted=False):
+        """Returns {artist_id: earliest_concert} mapping, in date order. Pass presorted=True if concerts are sorted by date."""
         artist_concerts = {}
-        for concert in sorted(concerts, key=lambda x: x.date):
-            if concert.artist not in artist_concerts:
-                artist_concerts[concert.artist] = concert
+        for concert in (concerts if presorted else sorted(concerts, key=lambda x: x.date)):
+            if concert.artist_id not in artist_concerts:
+                artist_concerts[concert.artist_id] = concert
         return artist_concerts
 
-    def _resolve_conflicts(self, new_concert, itinerary, artist_concerts):
-        """Handles same-day conflicts by proximity to last non-conflict."""
+    def _resolve_conflicts(self, new_concert, itinerary, ordered, dates):
+        """Handles same-day (or too-close) conflicts by proximity to last non-conflict."""
         last_concert = itinerary[-1]
         
-        if new_concert.date != last_concert.date:
+        if not self._is_conflict(new_concert, last_concert):
             itinerary.append(new_concert)
             return
         
         if len(itinerary) == 1:  # First conflict
-            next_concert = self._find_next_concert(new_concert, artist_concerts)
+            next_concert = self._find_next_concert(new_concert, ordered, dates)
             if next_concert and self._is_same_location(new_concert, next_concert):
                 itinerary[-1] = new_concert
         else:  # Normal conflict
@@ -175,19 +792,29 @@ class ItineraryBuilder:
             if self._is_closer(new_concert, last_concert, last_non_conflict):
                 itinerary[-1] = new_concert
 
-    def _find_next_concert(self, concert, artist_concerts):
+    def _is_conflict(self, new_concert, last_concert):
+        """Checks if new_concert is less than min_gap_days rest days after last_concert."""
+        if not self.min_gap_days:
+            return new_concert.date == last_concert.date
+        return self._day(new_concert.date) - self._day(last_concert.date) <= self.min_gap_days
+
+    def _day(self, date):
+        """Returns the day number of a 'YYYY-MM-DD' date, cached per date string."""
+        day = self._day_cache.get(date)
+        if day is None:
+            day = self._day_cache[date] = datetime.fromisoformat(date).toordinal()
+        return day
+
+    def _find_next_concert(self, concert, ordered, dates):
         """Returns the next chronological concert after the given one."""
-        for c in sorted(artist_concerts.values(), key=lambda x: x.date):
-            if c.date > concert.date:
-                return c
-        return None
+        index = bisect_right(dates, concert.date)
+        return ordered[index] if index < len(ordered) else None
 
     def _is_same_location(self, concert1, concert2):
         """Checks if two concerts are in the same location."""
         if not concert2:
             return False
-        return (concert1.latitude == concert2.latitude and 
-                concert1.longitude == concert2.longitude)
+        return concert1.venue_id == concert2.venue_id
 
     def _is_closer(self, new_concert, existing_concert, reference_concert):
         """Compares distances to reference concert."""
@@ -196,11 +823,16 @@ class ItineraryBuilder:
         return new_dist < existing_dist
 
     def _calculate_distance(self, concert1, concert2):
-        """Calculates Euclidean distance between two concerts."""
-        return math.hypot(
-            concert1.latitude - concert2.latitude,
-            concert1.longitude - concert2.longitude
-        )
+        """Calculates Euclidean distance between two concerts, cached per venue pair."""
+        key = (concert1.venue_id, concert2.venue_id)
+        distance = self._distance_cache.get(key)
+        if distance is None:
+            distance = math.hypot(
+                concert1.latitude - concert2.latitude,
+                concert1.longitude - concert2.longitude
+            )
+            self._distance_cache[key] = distance
+        return distance
     
     
 if __name__ == "__main__":
@@ -5,12 +5,16 @@ This script provides a interfact to run the tests and manage the experiment
 """
 
 import os
+import re
 import sys
 import time
+import signal
 import textwrap
 import random
 import json
-from logger import run_tests_with_logging, ExperimentLogger
+import asyncio
+import argparse
+from logger import run_tests_with_logging, run_profile_with_logging, diff_profile_runs, ExperimentLogger, open_history
 
 ALL_CONSTRAINTS = [
     "The itinerary should return a list of concerts that state the artist, date, and location of each concert.",
@@ -30,15 +34,128 @@ def print_header():
     print("=" * 80)
     print()
 
-def print_menu():
+def print_menu(jobs):
     print("MENU:")
-    print("1. Run tests and view results")
-    print("2. View current code coverage")
+    print("1. Run tests (in the background)")
+    print("2. Generate code coverage report (in the background)")
     print("3. View experiment progress")
     print("4. Record time for a task")
     print("5. View system requirements")
-    print("6. Exit")
+    print("6. View test and coverage results")
+    print("7. Profile tests and a large workload (in the background)")
+    print("8. Exit")
     print()
+    for line in jobs.status_lines():
+        print(line)
+    print()
+
+async def ainput(prompt=""):
+    """input() on a worker thread, so background jobs keep running while waiting."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, input, prompt)
+
+# ----- Background Jobs -----
+
+WATCHED_FILES = ("main.py", "test.py")
+TEST_LINE = re.compile(r"\.\.\. (ok|FAIL|ERROR|skipped|expected failure|unexpected success)")
+
+def watched_files_snapshot():
+    return tuple(os.path.getmtime(f) if os.path.exists(f) else None for f in WATCHED_FILES)
+
+class BackgroundJob:
+    """A test, coverage or profile run in a child process (see run_job), with live progress."""
+    
+    LABELS = {"tests": "Tests", "coverage": "Coverage", "profile": "Profile"}
+    
+    def __init__(self, kind, options=()):
+        self.kind = kind
+        self.options = tuple(options)
+        self.status = "running"
+        self.tests_done = 0
+        self.output = ""
+        self.started_at = time.time()
+        self.elapsed = None
+        self.snapshot = watched_files_snapshot()
+        self.process = None
+        self.task = None
+    
+    async def run(self):
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, "-u", os.path.abspath(__file__), "--job", self.kind, *self.options,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            start_new_session=True)
+        try:
+            stdout, _ = await asyncio.gather(self.process.stdout.read(), self._follow_progress())
+            await self.process.wait()
+        except asyncio.CancelledError:
+            self._kill()
+            await self.process.wait()
+            raise
+        self.output = stdout.decode(errors="replace")
+        self.status = {0: "passed", 1: "failed"}.get(self.process.returncode, "error")
+        self.elapsed = time.time() - self.started_at
+    
+    def _kill(self):
+        """Kills the child and, on POSIX, the worker processes it started (its session)."""
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        elif self.process.returncode is None:
+            self.process.kill()
+    
+    async def _follow_progress(self):
+        async for line in self.process.stderr:
+            if TEST_LINE.search(line.decode(errors="replace")):
+                self.tests_done += 1
+    
+    async def cancel(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.status = "cancelled"
+    
+    def status_line(self):
+        label = self.LABELS[self.kind]
+        if self.status == "running":
+            return f"{label}: running for {time.time() - self.started_at:.0f}s, {self.tests_done} tests done"
+        if self.status == "cancelled":
+            return f"{label}: cancelled"
+        return f"{label}: {self.status} in {self.elapsed:.2f}s"
+
+class JobRunner:
+    """Keeps at most one background job per kind."""
+    
+    def __init__(self):
+        self.jobs = {}
+    
+    async def start(self, kind, options=()):
+        """
+        Starts a job. A running job of the same kind is kept if main.py,
+        test.py and the options are unchanged, and cancelled in favour of a
+        new run otherwise.
+        """
+        current = self.jobs.get(kind)
+        if current and current.status == "running":
+            if current.snapshot == watched_files_snapshot() and current.options == tuple(options):
+                return current, False
+            await current.cancel()
+        
+        job = BackgroundJob(kind, options)
+        job.task = asyncio.create_task(job.run())
+        self.jobs[kind] = job
+        return job, True
+    
+    async def cancel_all(self):
+        for job in self.jobs.values():
+            if job.status == "running":
+                await job.cancel()
+    
+    def status_lines(self):
+        return [job.status_line() for job in self.jobs.values()]
 
 def assign_constraints():
     # Användaren får random valda constraints
@@ -157,12 +274,13 @@ def display_assigned_constraints(manual_indices, ai_indices):
     print("\nRemember: Follow the TDD cycle (Red-Green-Refactor) for each set of constraints.")
     print()
 
-def run_tests():
+def print_test_report():
+    """Runs the suite with logging and prints the report. Used by `--job tests`."""
     print("Running tests...")
     print()
     
     start_time = time.time()
-    test_results, coverage_data = run_tests_with_logging()
+    test_results, coverage_data = run_tests_with_logging(progress_stream=sys.stderr)
     elapsed_time = time.time() - start_time
     
     print(f"Tests completed in {elapsed_time:.2f} seconds.")
@@ -185,11 +303,10 @@ def run_tests():
     for file, metrics in coverage_data['file_coverage'].items():
         print(f"  {file}: {metrics['percentage']:.2f}% ({metrics['lines_covered']}/{metrics['lines_total']} lines)")
     
-    input("\nPress Enter to continue...")
+    return test_results['success']
 
-def view_coverage():
-    print("Generating coverage report...")
-    
+def print_coverage_report():
+    """Runs the suite under coverage and prints the report. Used by `--job coverage`."""
     import coverage
     cov = coverage.Coverage()
     cov.start()
@@ -198,7 +315,7 @@ def view_coverage():
     from test import ItineraryBuilderTest
     
     suite = unittest.TestLoader().loadTestsFromTestCase(ItineraryBuilderTest)
-    unittest.TextTestRunner(verbosity=0).run(suite)
+    result = unittest.TextTestRunner(stream=sys.stderr, verbosity=2).run(suite)
     
     cov.stop()
     
@@ -207,47 +324,152 @@ def view_coverage():
     cov.report()
     print("-" * 80)
     
-    input("\nPress Enter to continue...")
+    return result.wasSuccessful()
+
+DEFAULT_WORKLOAD_SIZE = 100000
+SHOWN_HOTSPOTS = 10
 
-def view_progress():
-    import json
+def print_profile_report(workload_size=DEFAULT_WORKLOAD_SIZE):
+    """
+    Profiles the suite and a synthetic workload, prints the hotspots and the
+    changes since the previous profile run. Used by `--profile` and `--job profile`.
+    """
+    print(f"Profiling tests and a {workload_size}-concert build_itinerary workload...")
+    print()
+    
+    profile_data, previous = run_profile_with_logging(workload_size, progress_stream=sys.stderr)
+    diff = diff_profile_runs(previous, profile_data) if previous else None
+    
+    for section, title in (("suite", "TEST SUITE"), ("workload", "WORKLOAD")):
+        data = profile_data[section]
+        print(f"{title}: {data['seconds']:.3f}s, peak memory {data['peak_memory_kb']:.1f} KB")
+        if diff:
+            print(f"  Since {previous['timestamp']}: {diff[section]['seconds']:+.3f}s, "
+                  f"{diff[section]['peak_memory_kb']:+.1f} KB")
+        print(f"  {'own time':>10} {'change':>9} {'calls':>9}  function")
+        for hotspot in data['hotspots'][:SHOWN_HOTSPOTS]:
+            if not diff:
+                change_text = ""
+            elif diff[section]['hotspots'][hotspot['function']] is None:
+                change_text = "unranked"
+            else:
+                change_text = f"{diff[section]['hotspots'][hotspot['function']]:+.4f}"
+            print(f"  {hotspot['total_time']:>10.4f} {change_text:>9} {hotspot['calls']:>9}  {hotspot['function']}")
+        print()
     
+    if diff:
+        print("unranked: not among the hotspots stored for the previous run.")
+    if not profile_data['tests_passed']:
+        print("Some tests failed; run the tests (option 1) for details.")
+    
+    return profile_data['tests_passed']
+
+JOB_COMMANDS = {
+    "tests": print_test_report,
+    "coverage": print_coverage_report,
+    "profile": print_profile_report,
+}
+
+def run_job(kind, **options):
+    """Entry point of the child process started by BackgroundJob."""
     try:
-        with open("experiment_log.json", "r") as f:
-            log_data = json.load(f)
-        
-        print("\nEXPERIMENT PROGRESS:")
+        return 0 if JOB_COMMANDS[kind](**options) else 1
+    except Exception:
+        import traceback
+        print(f"The {kind} job stopped with an error:")
+        traceback.print_exc(file=sys.stdout)
+        return 2
+
+async def run_tests(jobs):
+    job, started = await jobs.start("tests")
+    if started:
+        print("Tests started in the background. Select option 6 to see the results.")
+    else:
+        print("Tests are already running on the current files.")
+    await ainput("\nPress Enter to continue...")
+
+async def view_coverage(jobs):
+    job, started = await jobs.start("coverage")
+    if started:
+        print("Coverage report started in the background. Select option 6 to see it.")
+    else:
+        print("A coverage report is already running on the current files.")
+    await ainput("\nPress Enter to continue...")
+
+async def profile(jobs):
+    answer = await ainput(f"Workload size in concerts (Enter for {DEFAULT_WORKLOAD_SIZE}): ")
+    try:
+        workload_size = int(answer) if answer.strip() else DEFAULT_WORKLOAD_SIZE
+    except ValueError:
+        print(f"Error: '{answer}' is not a number.")
+        await ainput("\nPress Enter to continue...")
+        return
+    
+    job, started = await jobs.start("profile", ("--workload-size", str(workload_size)))
+    if started:
+        print("Profiling started in the background. Select option 6 to see the results.")
+    else:
+        print("Profiling is already running on the current files.")
+    await ainput("\nPress Enter to continue...")
+
+async def view_results(jobs):
+    while True:
+        clear_screen()
+        print_header()
+        print("TEST AND COVERAGE RESULTS:")
         print("-" * 80)
-        print(f"Experiment started: {log_data.get('experiment_start', 'N/A')}")
-        print(f"Total test runs: {len(log_data.get('test_runs', []))}")
-        print(f"Total file changes: {len(log_data.get('file_changes', []))}")
+        if not jobs.jobs:
+            print("No tests, coverage reports or profile runs started yet (options 1, 2 and 7).")
+        for job in jobs.jobs.values():
+            print(job.status_line())
+            if job.output:
+                print(textwrap.indent(job.output, '  '))
+            print()
         
-        if log_data.get('test_runs'):
-            latest_run = log_data['test_runs'][-1]
-            print("\nLatest test run:")
-            print(f"  Time: {latest_run['timestamp']}")
-            print(f"  Tests passed: {latest_run['results']['total'] - latest_run['results']['failures'] - latest_run['results']['errors']} / {latest_run['results']['total']}")
-        
-        if log_data.get('coverage_reports'):
-            latest_cov = log_data['coverage_reports'][-1]
-            print("\nLatest coverage report:")
-            print(f"  Time: {latest_cov['timestamp']}")
-            print(f"  Overall coverage: {latest_cov.get('total_coverage', 0):.2f}%")
-            
-            for file, metrics in latest_cov.get('file_coverage', {}).items():
-                print(f"  {file}: {metrics['percentage']:.2f}% ({metrics['lines_covered']}/{metrics['lines_total']} lines)")
-        
-        if log_data.get('task_times'):
-            print("\nRecorded task times:")
-            for task in log_data.get('task_times', []):
-                print(f"  {task['task']}: {task['duration']} minutes")
-        
-    except (FileNotFoundError, json.JSONDecodeError):
+        if await ainput("\nPress Enter to continue, or r to refresh: ") != "r":
+            return
+
+async def view_progress():
+    if not os.path.exists("experiment_log.json"):
         print("No experiment progress data available yet.")
+        await ainput("\nPress Enter to continue...")
+        return
+    
+    history = open_history("experiment_log.json")
+    summary = history.summary()
+    pass_trend = history.pass_rate_trend(limit=10)
+    history.close()
+    
+    print("\nEXPERIMENT PROGRESS:")
+    print("-" * 80)
+    print(f"Experiment started: {summary['experiment_start'] or 'N/A'}")
+    print(f"Total test runs: {summary['test_runs']}")
+    print(f"Total file changes: {summary['file_changes']}")
     
-    input("\nPress Enter to continue...")
+    latest_run = summary['latest_run']
+    if latest_run:
+        print("\nLatest test run:")
+        print(f"  Time: {latest_run['timestamp']}")
+        print(f"  Tests passed: {latest_run['total'] - latest_run['failures'] - latest_run['errors']} / {latest_run['total']}")
+        print(f"  Pass rate, last {len(pass_trend)} runs: " + " ".join(f"{rate:.0%}" for _, rate in pass_trend))
+    
+    latest_cov = summary['latest_coverage']
+    if latest_cov:
+        print("\nLatest coverage report:")
+        print(f"  Time: {latest_cov['timestamp']}")
+        print(f"  Overall coverage: {latest_cov['total_coverage'] or 0:.2f}%")
+        
+        for file, metrics in summary['latest_file_coverage'].items():
+            print(f"  {file}: {metrics['percentage']:.2f}% ({metrics['lines_covered']}/{metrics['lines_total']} lines)")
+    
+    if summary['task_totals']:
+        print("\nRecorded task times:")
+        for task, (minutes, entries) in summary['task_totals'].items():
+            print(f"  {task}: {minutes} minutes ({entries} entries)")
+    
+    await ainput("\nPress Enter to continue...")
 
-def record_time():
+async def record_time():
     print("\nRECORD TASK TIME:")
     print("-" * 80)
     print("Tasks:")
@@ -260,12 +482,12 @@ def record_time():
     print("7. Other (specify)")
     
     try:
-        task_type = int(input("\nSelect task type (1-7): "))
+        task_type = int(await ainput("\nSelect task type (1-7): "))
         if task_type < 1 or task_type > 7:
             raise ValueError("Invalid selection")
         
         if task_type == 7:
-            task_name = input("Enter task name: ")
+            task_name = await ainput("Enter task name: ")
         else:
             task_names = [
                 "Manual test writing (RED phase)",
@@ -277,19 +499,19 @@ def record_time():
             ]
             task_name = task_names[task_type - 1]
         
-        duration = float(input("Enter time spent (in minutes): "))
+        duration = float(await ainput("Enter time spent (in minutes): "))
         
         logger = ExperimentLogger()
         logger.log_task_time(task_name, duration)
         
         print(f"\nRecorded {duration} minutes for '{task_name}'.")
         
-    except (ValueError, IndexError) as e:
+    except (ValueError, IndexError, OSError) as e:
         print(f"Error: {e}")
     
-    input("\nPress Enter to continue...")
+    await ainput("\nPress Enter to continue...")
 
-def view_requirements():
+async def view_requirements():
     manual_indices, ai_indices = get_constraint_assignments()
     
     print("\nCONCERT ITINERARY BUILDER - SYSTEM REQUIREMENTS")
@@ -317,9 +539,9 @@ def view_requirements():
     print("  2. GREEN: Write code to make the test pass")
     print("  3. REFACTOR: Improve your code while keeping tests passing")
     
-    input("\nPress Enter to continue...")
+    await ainput("\nPress Enter to continue...")
 
-def main():
+async def main():
     """Main program loop."""
     manual_indices, ai_indices = get_constraint_assignments()
     
@@ -328,7 +550,7 @@ def main():
         print_header()
         
         display_tdd_info()
-        input("\nPress Enter to continue...")
+        await ainput("\nPress Enter to continue...")
         
         manual_indices, ai_indices = assign_constraints()
         save_constraint_assignments(manual_indices, ai_indices)
@@ -336,38 +558,61 @@ def main():
         clear_screen()
         print_header()
         display_experiment_instructions()
-        input("\nPress Enter to continue...")
+        await ainput("\nPress Enter to continue...")
         
         clear_screen()
         print_header()
         display_assigned_constraints(manual_indices, ai_indices)
-        input("\nPress Enter to continue to the main menu...")
+        await ainput("\nPress Enter to continue to the main menu...")
+    
+    jobs = JobRunner()
     
     while True:
         clear_screen()
         print_header()
-        print_menu()
+        print_menu(jobs)
         
-        choice = input("Select an option (1-6): ")
+        choice = await ainput("Select an option (1-8): ")
         print()
         
         if choice == "1":
-            run_tests()
+            await run_tests(jobs)
         elif choice == "2":
-            view_coverage()
+            await view_coverage(jobs)
         elif choice == "3":
-            view_progress()
+            await view_progress()
         elif choice == "4":
-            record_time()
+            await record_time()
         elif choice == "5":
-            view_requirements()
+            await view_requirements()
         elif choice == "6":
+            await view_results(jobs)
+        elif choice == "7":
+            await profile(jobs)
+        elif choice == "8":
+            await jobs.cancel_all()
             print("Exiting the experiment runner. Thank you for participating!")
             sys.exit(0)
         else:
             print("Invalid choice. Please try again.")
-            input("\nPress Enter to continue...")
+            await ainput("\nPress Enter to continue...")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concert Itinerary Builder experiment runner")
+    parser.add_argument("--job", choices=JOB_COMMANDS,
+                        help="run one job in this process and print its report (used for background runs)")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile the tests and a synthetic workload, log the run and exit")
+    parser.add_argument("--workload-size", type=int, default=DEFAULT_WORKLOAD_SIZE,
+                        help="number of concerts in the profiled workload")
+    args = parser.parse_args()
+    
+    if args.profile:
+        sys.exit(run_job("profile", workload_size=args.workload_size))
+    if args.job == "profile":
+        sys.exit(run_job(args.job, workload_size=args.workload_size))
+    if args.job:
+        sys.exit(run_job(args.job))
+    
     random.seed(42)
-    main()
\ No newline at end of file
+    asyncio.run(main())
@@ -8,6 +8,7 @@ Participants will implement tests based on the system specifications.
 import unittest
 from main import Concert, ItineraryBuilder
 from concerts_data import get_all_concerts
+from differential import ENGINES, find_counterexample
 
 class ItineraryBuilderTest(unittest.TestCase):
     """Test cases for the ItineraryBuilder class."""
@@ -113,5 +114,23 @@ class ItineraryBuilderTest(unittest.TestCase):
         itinerary = self.builder.build_itinerary(test_concerts)
         self.assertNotIn("NonExistentArtist", [c.artist for c in itinerary])  # Not in list
 
+    # ----- Differential Testing -----
+
+    def test_differential_current_vs_reference(self):
+        """Random catalogues: the live builder never disagrees with the frozen AI Refactor phase."""
+        counterexample = find_counterexample(ENGINES["current"], ENGINES["ai_refactor"], cases=1000)
+        self.assertIsNone(counterexample)
+
+    def test_differential_parallel_vs_reference(self):
+        """Random catalogues: sharded builder never disagrees with the frozen AI Refactor phase."""
+        counterexample = find_counterexample(ENGINES["parallel"], ENGINES["ai_refactor"], cases=300)
+        self.assertIsNone(counterexample)
+
+    def test_differential_shrinks_counterexample(self):
+        """A known disagreement (GREEN phase ignores proximity) shrinks to a few concerts."""
+        counterexample = find_counterexample(ENGINES["green"], ENGINES["ai_refactor"], cases=1000)
+        self.assertIsNotNone(counterexample)
+        self.assertLessEqual(len(counterexample), 3)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,325 @@
+"""
+Infrastructure tests for the Concert Itinerary Builder.
+
+This file tests the performance and tooling code around ItineraryBuilder
+(query options, serialization, snapshots, parallel building, synthetic data
+and experiment history). It is kept out of test.py so that the experiment
+runner's test counts and coverage only reflect the participants' tests.
+"""
+
+import io
+import os
+import json
+import tempfile
+import unittest
+import main
+from main import Concert, Itinerary, ItineraryBuilder, PreparedCatalogue, file_fingerprint, write_json_lines
+from concerts_data import get_all_concerts, generate_concert_rows, generate_concerts, write_concerts_csv, read_concerts_csv
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from logger import ExperimentLogger, open_history, diff_profile_runs, _top_hotspots
+
+def _concert_ids_resolve(concert):
+    return main.ARTISTS.value(concert.artist_id) == concert.artist and \
+        main.VENUES.value(concert.venue_id) == (concert.latitude, concert.longitude)
+
+def _load_snapshot_size(path):
+    return len(ItineraryBuilder().load_snapshot(path, get_all_concerts()))
+
+def _log_task_times(log_file, count):
+    logger = ExperimentLogger(log_file)
+    for _ in range(count):
+        logger.log_task_time("RED", 1.0)
+    logger.history.close()
+
+class InfrastructureTest(unittest.TestCase):
+    """Test cases for the code around ItineraryBuilder."""
+    
+    def setUp(self):
+        """Set up for the tests."""
+        self.builder = ItineraryBuilder()
+        
+        self.all_concerts = get_all_concerts()
+    
+    # ----- Query Options -----
+
+    def test_date_window_uses_earliest_concert_inside_window(self):
+        """Only concerts in [start_date, end_date] are used, including for earliest-per-artist."""
+        builder = ItineraryBuilder(start_date="2025-06-01", end_date="2025-08-31")
+        itinerary = builder.build_itinerary(self.all_concerts)
+        self.assertTrue(all("2025-06-01" <= c.date <= "2025-08-31" for c in itinerary))
+        taylor = [c for c in itinerary if c.artist == "Taylor Swift"]
+        self.assertEqual([c.date for c in taylor], ["2025-06-10"])  # 2025-05-20 is outside the window
+
+    def test_date_window_without_concerts(self):
+        """An empty window is indicated like an empty catalogue."""
+        builder = ItineraryBuilder(start_date="2030-01-01")
+        self.assertEqual(builder.build_itinerary(self.all_concerts), ["No concerts available"])
+
+    def test_min_gap_days_leaves_rest_days(self):
+        """With min_gap_days=1 consecutive concerts are at least two days apart."""
+        test_concerts = [
+            Concert("ArtistA", "2025-06-10", "Oslo", 59.9139, 10.7522),
+            Concert("ArtistB", "2025-06-11", "Stockholm", 59.3293, 18.0686),
+            Concert("ArtistC", "2025-06-12", "Oslo", 59.9139, 10.7522),
+            Concert("ArtistD", "2025-06-14", "Oslo", 59.9139, 10.7522),
+        ]
+        itinerary = ItineraryBuilder(min_gap_days=1).build_itinerary(test_concerts)
+        self.assertEqual([c.date for c in itinerary], ["2025-06-10", "2025-06-12", "2025-06-14"])
+
+    # ----- Result Serialization -----
+
+    def test_result_json_matches_dict_dump(self):
+        """Itinerary JSON export equals json.dumps of one dict per concert, streamed or not."""
+        result = self.builder.build_result(self.all_concerts)
+        self.assertEqual(list(result), self.builder.build_itinerary(self.all_concerts))
+        expected = [{"artist": c.artist, "date": c.date, "location": c.location,
+                     "latitude": c.latitude, "longitude": c.longitude} for c in result]
+        self.assertEqual(json.loads(result.to_json_bytes()), expected)
+        
+        stream = io.BytesIO()
+        write_json_lines([result, self.builder.build_result([])], stream)
+        self.assertEqual([json.loads(line) for line in stream.getvalue().splitlines()], [expected, []])
+
+    def test_result_binary_round_trip(self):
+        """Binary encoding decodes back to the same concert data."""
+        result = self.builder.build_result(self.all_concerts)
+        decoded = Itinerary.from_binary(result.to_binary())
+        self.assertEqual([(c.artist, c.date, c.location, c.latitude, c.longitude) for c in decoded],
+                         [(c.artist, c.date, c.location, c.latitude, c.longitude) for c in result])
+        self.assertTrue(self.builder.build_result([]).is_empty)
+        self.assertEqual(self.builder.build_result([]).to_list(), ["No concerts available"])
+    
+    def test_result_binary_rejects_truncated_input(self):
+        """Every truncation of a binary encoding is rejected with ValueError."""
+        data = self.builder.build_result(self.all_concerts).to_binary()
+        for size in range(len(data)):
+            with self.assertRaises(ValueError):
+                Itinerary.from_binary(data[:size])
+        with self.assertRaises(ValueError):
+            Itinerary.from_binary(data + b"\0")
+
+    # ----- Prepared State Snapshots -----
+
+    def test_prepared_catalogue_matches_plain_build(self):
+        """Building from prepared state gives the same itinerary, with and without a window."""
+        for builder in (self.builder, ItineraryBuilder(start_date="2025-06-01", end_date="2025-08-31")):
+            prepared = builder.prepare(self.all_concerts)
+            self.assertEqual(builder.build_itinerary(prepared), builder.build_itinerary(self.all_concerts))
+
+    def test_snapshot_restores_and_rebuilds_when_stale(self):
+        """A snapshot restores for its own catalogue and is rebuilt for a changed one."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "catalogue.snapshot")
+            expected = self.builder.build_itinerary(self.all_concerts)
+            
+            self.builder.save_snapshot(path, self.builder.prepare(self.all_concerts))
+            restored = ItineraryBuilder().load_snapshot(path, self.all_concerts)
+            self.assertIsInstance(restored.order, memoryview)
+            self.assertEqual(ItineraryBuilder().build_itinerary(restored), expected)
+            order, head = restored.order, restored.order[:3]
+            restored.close()
+            self.assertEqual(restored.order[:3], list(head))
+            self.assertRaises(ValueError, len, order)
+            
+            changed = self.all_concerts + [Concert("New Artist", "2025-12-01", "Oslo", 59.9139, 10.7522)]
+            self.assertIsNone(PreparedCatalogue.load(path, changed))
+            rebuilt = ItineraryBuilder().load_snapshot(path, changed)
+            self.assertEqual(ItineraryBuilder().build_itinerary(rebuilt), self.builder.build_itinerary(changed))
+            
+            loaded = PreparedCatalogue.load(path, changed)  # rewritten for the new catalogue
+            self.assertIsNotNone(loaded)
+            loaded[0].close()
+    
+    def test_snapshot_checks_source_fingerprint(self):
+        """A snapshot made with a source fingerprint restores only for that fingerprint."""
+        rows = list(generate_concert_rows(50, artists=10, seed=5))
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "concerts.csv")
+            path = os.path.join(tmp, "catalogue.snapshot")
+            write_concerts_csv(csv_path, rows)
+            concerts = list(read_concerts_csv(csv_path))
+            fingerprint = file_fingerprint(csv_path)
+            
+            self.builder.save_snapshot(path, self.builder.prepare(concerts, fingerprint))
+            self.assertIsNone(PreparedCatalogue.load(path, concerts))
+            loaded = PreparedCatalogue.load(path, concerts, fingerprint)
+            self.assertIsNotNone(loaded)
+            self.assertEqual(ItineraryBuilder().build_itinerary(loaded[0]),
+                             self.builder.build_itinerary(concerts))
+            loaded[0].close()
+            
+            write_concerts_csv(csv_path, rows[1:])
+            self.assertIsNone(PreparedCatalogue.load(path, concerts, file_fingerprint(csv_path)))
+
+    def test_concurrent_snapshot_rebuilds(self):
+        """Processes rebuilding one missing snapshot together all succeed."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "catalogue.snapshot")
+            with ProcessPoolExecutor(max_workers=4) as pool:
+                sizes = list(pool.map(_load_snapshot_size, [path] * 8))
+            self.assertEqual(sizes, [len(self.all_concerts)] * 8)
+            self.assertEqual(os.listdir(tmp), ["catalogue.snapshot"])
+    
+    def test_snapshot_rewrite_failure_still_prepares(self):
+        """An unwritable snapshot location still yields the prepared catalogue."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "missing", "catalogue.snapshot")
+            prepared = ItineraryBuilder().load_snapshot(path, self.all_concerts)
+            self.assertEqual(ItineraryBuilder().build_itinerary(prepared),
+                             self.builder.build_itinerary(self.all_concerts))
+
+    # ----- Performance Variants -----
+
+    def test_parallel_matches_serial(self):
+        """Sharded builder returns the same itinerary as the serial one."""
+        expected = self.builder.build_itinerary(self.all_concerts)
+        for workers in (1, 2, 3):
+            itinerary = self.builder.build_itinerary_parallel(self.all_concerts, workers=workers)
+            self.assertEqual(itinerary, expected)
+
+    def test_parallel_respects_date_window(self):
+        """Workers apply the date window before picking each artist's earliest concert."""
+        builder = ItineraryBuilder(start_date="2025-06-01", end_date="2025-08-31")
+        expected = builder.build_itinerary(self.all_concerts)
+        self.assertEqual(builder.build_itinerary_parallel(self.all_concerts, workers=3), expected)
+
+    def test_interned_ids_shared_by_equal_values(self):
+        """Equal artists, locations and coordinates map to the same ids and objects."""
+        first = Concert("Artist" + "X", "2025-06-01", "Oslo", 59.9139, 10.7522)
+        second = Concert("ArtistX", "2025-07-01", "Oslo", 59.9139, 10.7522)
+        other = Concert("ArtistY", "2025-07-01", "Stockholm", 59.3293, 18.0686)
+        self.assertEqual(first.artist_id, second.artist_id)
+        self.assertIs(first.artist, second.artist)
+        self.assertEqual(first.venue_id, second.venue_id)
+        self.assertEqual(first.location_id, second.location_id)
+        self.assertNotEqual(first.artist_id, other.artist_id)
+        self.assertNotEqual(first.venue_id, other.venue_id)
+        self.assertTrue(self.builder._is_same_location(first, second))
+        self.assertFalse(self.builder._is_same_location(first, other))
+    
+    def test_interning_keeps_given_coordinates(self):
+        """A concert keeps its own coordinates even if equal ones were interned first."""
+        Concert("ArtistInt", "2025-06-01", "Null Island", 0, 18)
+        concert = Concert("ArtistFloat", "2025-06-02", "Null Island", -0.0, 18.0)
+        self.assertEqual(repr((concert.latitude, concert.longitude)), "(-0.0, 18.0)")
+        self.assertIn(b'"latitude":-0.0,"longitude":18.0', Itinerary([concert]).to_json_bytes())
+    
+    def test_pickled_concert_reinterns_in_worker(self):
+        """A concert sent to a fresh process gets ids valid in that process."""
+        concert = Concert("ArtistPickled", "2025-06-01", "Reykjavik", 64.1466, -21.9426)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            self.assertTrue(pool.submit(_concert_ids_resolve, concert).result())
+
+    # ----- Synthetic Data -----
+
+    def test_generator_is_seeded(self):
+        """Same seed gives the same rows; collision_rate=1 keeps a single date."""
+        self.assertEqual(list(generate_concert_rows(50, seed=7)), list(generate_concert_rows(50, seed=7)))
+        dates = {c.date for c in generate_concerts(50, seed=7, collision_rate=1.0)}
+        self.assertEqual(len(dates), 1)
+
+    def test_generated_csv_round_trip(self):
+        """Rows written to CSV read back as equal Concert data."""
+        rows = list(generate_concert_rows(20, artists=5, seed=3))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "concerts.csv")
+            self.assertEqual(write_concerts_csv(path, rows), 20)
+            loaded = [(c.artist, c.date, c.location, c.latitude, c.longitude) for c in read_concerts_csv(path)]
+        self.assertEqual(loaded, rows)
+
+    # ----- Profiling -----
+
+    def test_profile_diff_marks_new_hotspots(self):
+        """Profile diffs report time and memory changes and flag new hotspots."""
+        def run(seconds, peak, hotspots):
+            section = {"seconds": seconds, "peak_memory_kb": peak,
+                       "hotspots": [{"function": f, "calls": 1, "total_time": t, "cumulative_time": t}
+                                    for f, t in hotspots]}
+            return {"suite": section, "workload": section}
+        
+        previous = run(1.0, 100.0, [("main.py:sort", 0.5)])
+        current = run(1.5, 80.0, [("main.py:sort", 0.75), ("main.py:scan", 0.25)])
+        diff = diff_profile_runs(previous, current)["workload"]
+        self.assertEqual(diff["seconds"], 0.5)
+        self.assertEqual(diff["peak_memory_kb"], -20.0)
+        self.assertEqual(diff["hotspots"], {"main.py:sort": 0.25, "main.py:scan": None})
+    
+    def test_hotspots_keyed_by_file_and_qualified_name(self):
+        """Hotspot keys leave out line numbers and tell methods of different classes apart."""
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.runcall(lambda: Itinerary(self.builder.build_itinerary(
+            [Concert("ArtistQ", "2025-06-01", "Oslo", 59.9139, 10.7522)])))
+        functions = [h["function"] for h in _top_hotspots(profiler, 100)]
+        self.assertIn("main.py:ItineraryBuilder.build_itinerary", functions)
+        self.assertIn("main.py:Concert.__init__", functions)
+        self.assertIn("main.py:Itinerary.__init__", functions)
+        self.assertEqual(len(functions), len(set(functions)))
+
+    # ----- Experiment History -----
+
+    def test_history_store_imports_log_and_tracks_totals(self):
+        """History store imports experiment_log.json once and keeps running totals."""
+        log_data = {
+            "experiment_start": "2025-04-09T20:10:06",
+            "test_runs": [
+                {"timestamp": "t1", "results": {"total": 4, "failures": 2, "errors": 0, "skipped": 0, "success": False}},
+                {"timestamp": "t2", "results": {"total": 4, "failures": 0, "errors": 0, "skipped": 0, "success": True}},
+            ],
+            "file_changes": [],
+            "coverage_reports": [{"timestamp": "t2", "total_coverage": 80.0, "file_coverage": {
+                "main.py": {"lines_total": 10, "lines_covered": 8, "lines_missed": 2, "percentage": 80.0}}}],
+            "task_times": [{"timestamp": "t1", "task": "RED", "duration": 5.0}],
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, "experiment_log.json")
+            with open(log_file, "w") as f:
+                json.dump(log_data, f)
+            
+            history = open_history(log_file)
+            history.record_task_time("t3", "RED", 2.5)
+            history.close()
+            
+            history = open_history(log_file)
+            summary = history.summary()
+            self.assertEqual(summary["test_runs"], 2)
+            self.assertEqual(summary["latest_run"]["timestamp"], "t2")
+            self.assertEqual(summary["latest_file_coverage"]["main.py"]["lines_covered"], 8)
+            self.assertEqual(summary["task_totals"], {"RED": (7.5, 2)})
+            self.assertEqual(history.pass_rate_trend(), [("t1", 0.5), ("t2", 1.0)])
+            self.assertEqual(history.coverage_trend("main.py"), [("t2", 80.0)])
+            history.close()
+            
+            # A reset log (new experiment_start) replaces the stored history.
+            with open(log_file, "w") as f:
+                json.dump({"experiment_start": "2025-05-01T09:00:00", "test_runs": [],
+                           "file_changes": [], "coverage_reports": [], "task_times": []}, f)
+            history = open_history(log_file)
+            summary = history.summary()
+            self.assertEqual(summary["experiment_start"], "2025-05-01T09:00:00")
+            self.assertEqual(summary["test_runs"], 0)
+            self.assertEqual(summary["task_totals"], {})
+            history.close()
+    
+    def test_concurrent_loggers_keep_every_entry(self):
+        """Loggers in several processes never lose, clobber or double each other's entries."""
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, "experiment_log.json")
+            with open(log_file, "w") as f:
+                json.dump({"experiment_start": "2025-04-09T20:10:06", "test_runs": [],
+                           "file_changes": [], "coverage_reports": [],
+                           "task_times": [{"timestamp": "t0", "task": "RED", "duration": 1.0}] * 50}, f)
+            with ProcessPoolExecutor(max_workers=4) as pool:
+                list(pool.map(_log_task_times, [log_file] * 4, [25] * 4))
+            
+            with open(log_file) as f:
+                self.assertEqual(len(json.load(f)["task_times"]), 150)
+            self.assertFalse([name for name in os.listdir(tmp) if name.endswith(".tmp")])
+            history = open_history(log_file)
+            self.assertEqual(history.task_durations(), {"RED": (150.0, 150)})
+            history.close()
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file